@@ -26,23 +26,23 @@ class AD5245(I2CDevice):
 
 		#Read back current wiper settings
                 self.__wiper_pos = self.readU8(0)
-                self.__tot_resistance = 100.0
+                self.__res_scale = 256.0 / 100.0
                 self.__low_pd = 0.0
-                self.__high_pd = 3.3
+                self.__pd_scale = 256.0 / 3.3
 
         def set_total_resistance(self, resistance):
                 """Sets the total resistance across the potentiometer for set_resistance()
                 :param resistance: Total resistance between H- and L- (Kiloohms)
                 """
 
-                self.__tot_resistance = float(resistance)
+                self.__res_scale = 256.0 / float(resistance)
 
         def set_resistance(self, resistance):
                 """Sets the resistance of the wiper in rheostat mode
                 :param resistance: Desired resistance between H- and W- (Kiloohms)
                 """
 
-                self.__wiper_pos = int(resistance / self.__tot_resistance * 256.0)
+                self.__wiper_pos = int(resistance * self.__res_scale)
                 self.write8(0, self.__wiper_pos)
 
         def set_terminal_PDs(self, low, high):
@@ -52,14 +52,14 @@ class AD5245(I2CDevice):
                 """
 
                 self.__low_pd = float(low)
-                self.__high_pd = float(high)
+                self.__pd_scale = 256.0 / (float(high) - self.__low_pd)
 
         def set_PD(self, pd):
                 """Sets the potential difference of the wiper in potential divider mode
                 :param pd: Target potential difference (Volts)
                 """
 
-                self.__wiper_pos = int((pd - self.__low_pd) / (self.__high_pd - self.__low_pd) * 256.0)
+                self.__wiper_pos = int((pd - self.__low_pd) * self.__pd_scale)
                 self.write8(0, self.__wiper_pos)
 
         def set_wiper(self, position):
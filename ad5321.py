@@ -9,6 +9,9 @@ James Hogge, STFC Application Engineering Group.
 
 from lpdpower.i2c_device import I2CDevice, I2CException
 
+# Scale factor from ADUs to fraction of full scale
+_INV_4096 = 1.0 / 4096.0
+
 
 class AD5321(I2CDevice):
     """AD5321 class.
@@ -38,10 +41,8 @@ class AD5321(I2CDevice):
         if value < 0.0 or value > 1.0:
             raise I2CException("Illegal output value {} specified".format(value))
 
-        # Convert the value to ADUs
-        value = int(value * 4096)
-        if value == 4096:
-            value = 4095
+        # Convert the value to ADUs, clamping full scale to the maximum code
+        value = min(int(value * 4096), 4095)
 
         # Extract the MSB and LSB
         msb = (value & 0xFF00) >> 8
@@ -58,11 +59,11 @@ class AD5321(I2CDevice):
 
         :return current output seting as fraction of full scale.
         """
-        # Read the value
-        value = self.readU16(0)
-
-        # Reverse bytes
-        value = ((value & 0xff00) >> 8) + ((value & 0xff) << 8)
+        # Read the value, MSB first
+        data = self.readList(0, 2)
+        if data == self.ERROR:
+            return data
+        value = (data[0] << 8) | data[1]
 
         # Return scaled value
-        return value / 4096.0
+        return value * _INV_4096
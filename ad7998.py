@@ -7,6 +7,10 @@ James Hogge, STFC Application Engineering Group.
 """
 
 from i2c_device import I2CDevice, I2CException
+import struct
+
+# Scale factor from ADUs to fraction of full scale
+_INV_4095 = 1.0 / 4095.0
 
 
 class AD7998(I2CDevice):
@@ -18,6 +22,9 @@ class AD7998(I2CDevice):
 
     NUM_ADC_CHANNELS = 8
 
+    # Configuration register value enabling all channels for sequence conversions
+    CONFIG_ALL_CHANNELS = 0x0FF8
+
     def __init__(self, address=0x20, **kwargs):
         """Initialise the AD7998 device.
 
@@ -30,6 +37,9 @@ class AD7998(I2CDevice):
         # Set cycle register to fastest conversion mode
         self.write8(3, 1)
 
+        # Enable all channels in the configuration register for sequence conversions
+        self.writeList(2, [self.CONFIG_ALL_CHANNELS >> 8, self.CONFIG_ALL_CHANNELS & 0xff])
+
     def read_input_raw(self, channel):
         """Convert and read a raw ADC value on a channel.
 
@@ -40,19 +50,16 @@ class AD7998(I2CDevice):
         :return raw conversion result
         """
         # Check legal channel requested
-        if channel < 0 or channel >= self.NUM_ADC_CHANNELS:
+        if not 0 <= channel < _NUM_ADC_CHANNELS:
             raise I2CException("Illegal channel {} requested".format(channel))
 
-        # Trigger a conversion on channel, setting upper 4 bits of address pointer
-        self.write8(0x70 + ((channel + 1) << 4), 0)
-
-        # Read conversion register
-        data = self.readU16(0)
-
-        # Swap bytes to correct order
-        data = ((data & 0xff) << 8) + ((data & 0xff00) >> 8)
+        # Trigger a conversion on channel, setting upper 4 bits of address pointer, and read
+        # back the conversion result MSB first in a single combined transaction
+        data = self.readList(0x70 + ((channel + 1) << 4), 2)
+        if data == self.ERROR:
+            return data
 
-        return data
+        return struct.unpack('>H', bytearray(data))[0]
 
     def read_input_scaled(self, channel):
         """Convert and read a scaled valye on a channel.
@@ -66,9 +73,49 @@ class AD7998(I2CDevice):
         """
         # Trigger conversion and read raw value
         data = self.read_input_raw(channel)
+        if data == self.ERROR:
+            return data
 
         # Mask off channel identifier
         data &= 0xfff
 
         # Return scaled value
-        return data / 4095.0
+        return data * _INV_4095
+
+    def read_all_raw(self):
+        """Convert and read raw ADC values on all channels.
+
+        This method triggers a conversion on the sequence of all channels and
+        reads back every raw 16-bit result in a single transaction
+
+        :return tuple of raw conversion results, ordered by channel
+        """
+        # Trigger a sequence conversion and read all conversion results, MSB first
+        data = self.readList(0x70, 2 * self.NUM_ADC_CHANNELS)
+        if data == self.ERROR:
+            return data
+
+        return _ALL_CHANNELS_FORMAT.unpack(bytearray(data))
+
+    def read_all_scaled(self):
+        """Convert and read scaled values on all channels.
+
+        This method triggers a conversion on the sequence of all channels and
+        returns a list of values as fractions of the full scale i.e between
+        values of 0.0 and 1.0
+
+        :return list of scaled conversion results, ordered by channel
+        """
+        # Trigger conversions and read raw values
+        data = self.read_all_raw()
+        if data == self.ERROR:
+            return data
+
+        # Mask off channel identifiers and return scaled values
+        return [(value & 0xfff) * _INV_4095 for value in data]
+
+
+# Number of channels for channel checks and format of the conversion results read back
+# for all channels
+_NUM_ADC_CHANNELS = AD7998.NUM_ADC_CHANNELS
+_ALL_CHANNELS_FORMAT = struct.Struct('>%dH' % _NUM_ADC_CHANNELS)
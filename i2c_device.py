@@ -12,6 +12,9 @@ James Hogge, Tim Nicholls, STFC Application Engineering Group.
 
 import smbus
 import logging
+import threading
+import types
+from contextlib import contextmanager
 
 
 class I2CException(Exception):
@@ -23,12 +26,17 @@ class I2CException(Exception):
 def call_pre_access(func):
     """Call pre-access decorator for I2CDevice access methods.
 
-    Allows pre-access attribute to be called if defined on I2C device accessors.
+    Allows pre-access attribute to be called if defined on I2C device accessors. The bus
+    lock is held across the pre-access call and the access itself, so that e.g. a bus
+    multiplexer channel cannot be changed by another thread in between.
     """
     def wrapper(_self, *args, **kwargs):
-        if _self.pre_access is not None and callable(_self.pre_access):
-            _self.pre_access(_self)
-        return func(_self, *args, **kwargs)
+        with _self._bus_lock:
+            pre_access = _self._pre_access
+            if pre_access is not None:
+                pre_access(_self)
+            return func(_self, *args, **kwargs)
+    wrapper.undecorated = func
     return wrapper
 
 
@@ -43,8 +51,17 @@ class I2CDevice(object):
 
     _enable_exceptions = False
 
+    # SMBus handles and locks shared between all devices on the same bus
+    _bus_cache = {}
+    _bus_locks = {}
+
     ERROR = -1
 
+    # Access methods decorated with call_pre_access
+    _accessors = (
+        'write8', 'write16', 'writeList', 'readList', 'readU8', 'readS8', 'readU16', 'readS16'
+    )
+
     @classmethod
     def enable_exceptions(cls):
         """Enable I2CDevice exceptions."""
@@ -65,10 +82,50 @@ class I2CDevice(object):
         :param debug: enable debug access logging
         """
         self.address = address
-        self.bus = smbus.SMBus(busnum if busnum >= 0 else 2)
+
+        # Share a single SMBus handle and lock between all devices on the same bus
+        busnum = busnum if busnum >= 0 else 2
+        if busnum not in I2CDevice._bus_cache:
+            I2CDevice._bus_cache[busnum] = smbus.SMBus(busnum)
+            I2CDevice._bus_locks[busnum] = threading.RLock()
+        self.bus = I2CDevice._bus_cache[busnum]
+        self._bus_lock = I2CDevice._bus_locks[busnum]
         self.debug = debug
         self.pre_access = None
 
+    @property
+    def pre_access(self):
+        """Get the pre-access callback for the device."""
+        return self._pre_access
+
+    @pre_access.setter
+    def pre_access(self, pre_access):
+        """Set the pre-access callback for the device.
+
+        If the callback is cleared, the access methods of the instance are bound directly to
+        their undecorated implementations, bypassing the pre-access check for each access.
+
+        :param pre_access: callback to call before each access, or None
+        """
+        self._pre_access = pre_access
+        for name in self._accessors:
+            if pre_access is None:
+                self.__dict__[name] = types.MethodType(getattr(type(self), name).undecorated, self)
+            else:
+                self.__dict__.pop(name, None)
+
+    @contextmanager
+    def hold(self):
+        """Hold the bus lock across several accesses to the device.
+
+        Within the context, accesses from other threads cannot intervene in a multi-register
+        sequence, e.g. a read-modify-write. The pre-access callback is still called for each
+        access, as other devices accessed within the context may change e.g. the selected
+        bus multiplexer channel; TCA9548 skips reselecting a channel that is still selected.
+        """
+        with self._bus_lock:
+            yield self
+
     def handle_error(self, access_name, register, error):
         """Handle exception condition for I2CDevice.
 
@@ -93,7 +150,7 @@ class I2CDevice(object):
         try:
             self.bus.write_byte_data(self.address, reg, value)
             if self.debug:
-                logging.debug("I2C: Wrote 0x%02X to register 0x%02X" % (value, reg))
+                logging.debug("I2C: Wrote 0x%02X to register 0x%02X", value, reg)
         except IOError as err:
             return self.handle_error('write8', reg, err)
 
@@ -103,8 +160,8 @@ class I2CDevice(object):
         try:
             self.bus.write_word_data(self.address, reg, value)
             if self.debug:
-                logging.debug("I2C: Wrote 0x%02X to register pair 0x%02X,0x%02X" %
-                              (value, reg, reg+1))
+                logging.debug("I2C: Wrote 0x%02X to register pair 0x%02X,0x%02X",
+                              value, reg, reg+1)
         except IOError as err:
             return self.handle_error('write16', value, err)
 
@@ -114,7 +171,7 @@ class I2CDevice(object):
         try:
             self.bus.write_i2c_block_data(self.address, reg, list)
             if self.debug:
-                logging.debug("I2C: Wrote list to register 0x%02X:" % reg)
+                logging.debug("I2C: Wrote list to register 0x%02X:", reg)
                 logging.debug(list)
         except IOError as err:
             return self.handle_error('writeList', reg, err)
@@ -125,8 +182,8 @@ class I2CDevice(object):
         try:
             results = self.bus.read_i2c_block_data(self.address, reg, length)
             if self.debug:
-                logging.debug("I2C: Device 0x%02X returned the following from reg 0x%02X" %
-                              (self.address, reg))
+                logging.debug("I2C: Device 0x%02X returned the following from reg 0x%02X",
+                              self.address, reg)
                 logging.debug(results)
             return results
         except IOError as err:
@@ -138,8 +195,8 @@ class I2CDevice(object):
         try:
             result = self.bus.read_byte_data(self.address, reg)
             if self.debug:
-                logging.debug("I2C: Device 0x%02X returned 0x%02X from reg 0x%02X" %
-                              (self.address, result & 0xFF, reg))
+                logging.debug("I2C: Device 0x%02X returned 0x%02X from reg 0x%02X",
+                              self.address, result & 0xFF, reg)
             return result
         except IOError as err:
             return self.handle_error('readU8', reg, err)
@@ -151,8 +208,8 @@ class I2CDevice(object):
             result = self.bus.read_byte_data(self.address, reg)
             result = (result - 256) if result > 127 else result
             if self.debug:
-                logging.debug("I2C: Device 0x%02X returned 0x%02X from reg 0x%02X" %
-                              (self.address, result & 0xFF, reg))
+                logging.debug("I2C: Device 0x%02X returned 0x%02X from reg 0x%02X",
+                              self.address, result & 0xFF, reg)
             return result
         except IOError as err:
             return self.handle_error('readS8', reg, err)
@@ -163,8 +220,8 @@ class I2CDevice(object):
         try:
             result = self.bus.read_word_data(self.address, reg)
             if (self.debug):
-                logging.debug("I2C: Device 0x%02X returned 0x%04X from reg 0x%02X" %
-                              (self.address, result & 0xFFFF, reg))
+                logging.debug("I2C: Device 0x%02X returned 0x%04X from reg 0x%02X",
+                              self.address, result & 0xFFFF, reg)
             return result
         except IOError as err:
             return self.handle_error('readU16', reg, err)
@@ -175,8 +232,8 @@ class I2CDevice(object):
         try:
             result = self.bus.read_word_data(self.address, reg)
             if (self.debug):
-                logging.debug("I2C: Device 0x%02X returned 0x%04X from reg 0x%02X" %
-                              (self.address, result & 0xFFFF, reg))
+                logging.debug("I2C: Device 0x%02X returned 0x%04X from reg 0x%02X",
+                              self.address, result & 0xFFFF, reg)
             return result
         except IOError as err:
             return self.handle_error('readS16', reg, err)
@@ -11,8 +11,25 @@ pins, setting IO direction and enabling pullups.
 James Hogge, STFC Application Engineering Group.
 """
 
+from contextlib import contextmanager
+
 from lpdpower.i2c_device import I2CDevice
 
+# Bit masks for each pin in the MCP23008 8-bit registers
+_PIN_MASKS = tuple(1 << pin for pin in range(8))
+
+
+def _pin_mask(pin, method):
+    """Get the register bit mask for a pin, checking that the pin is valid.
+
+    :param pin: pin to get the bit mask for
+    :param method: name of the calling method, reported if the pin is invalid
+    :return bit mask of the pin
+    """
+    if not 0 <= pin < len(_PIN_MASKS):
+        raise ValueError("MCP23008::{}() expected a pin in the range 0-7".format(method))
+    return _PIN_MASKS[pin]
+
 
 class MCP23008(I2CDevice):
     """MCP23008 class.
@@ -22,9 +39,14 @@ class MCP23008(I2CDevice):
 
     # Addresses of MCP23008 registers for IO direction, pullups and r/w operations
     IODIR = 0x00
+    IPOL = 0x01
+    IOCON = 0x05
     GPPU = 0x06
     GPIO = 0x09
 
+    # IOCON sequential operation disable bit, which disables register address auto-increment
+    SEQOP = 0x20
+
     # Definition of input and output modes
     IN = 0
     OUT = 1
@@ -42,10 +64,87 @@ class MCP23008(I2CDevice):
         # Initialise the I2CDevice superclass instance
         I2CDevice.__init__(self, address, **kwargs)
 
-        # Synchronise local buffered register values with state of device
-        self.__iodir = self.readU8(self.IODIR)
-        self.__gppu = self.readU8(self.GPPU)
-        self.__gpio = self.readU8(self.GPIO)
+        # Synchronise local buffered register values with state of device. If sequential
+        # operation is enabled, read the register block from IODIR to GPIO in a single
+        # transaction, otherwise the register address does not auto-increment
+        iocon = self.readU8(self.IOCON)
+        if iocon != self.ERROR and not iocon & self.SEQOP:
+            regs = self.readList(self.IODIR, self.GPIO - self.IODIR + 1)
+        else:
+            regs = self.ERROR
+
+        if regs == self.ERROR:
+            # Read registers individually and leave the configuration registers unknown so
+            # the register block is not written back
+            self.__iodir = self.readU8(self.IODIR)
+            self.__gppu = self.readU8(self.GPPU)
+            self.__gpio = self.readU8(self.GPIO)
+            self.__config = None
+        else:
+            self.__iodir = regs[self.IODIR]
+            self.__gppu = regs[self.GPPU]
+            self.__gpio = regs[self.GPIO]
+
+            # Buffer the configuration registers between IODIR and GPPU so that the full
+            # register block can be written back in a single transaction
+            self.__config = regs[self.IPOL:self.GPPU]
+
+        # Clear deferred write state
+        self.__deferred = 0
+        self.__dirty = {}
+
+    def __write_register(self, reg, value):
+        """Write a buffered register value to the device, unless writes are deferred.
+
+        :param reg: register to write
+        :param value: buffered register value to write
+        """
+        if self.__deferred:
+            self.__dirty[reg] = value
+        else:
+            self.write8(reg, value)
+
+    @contextmanager
+    def defer_writes(self):
+        """Defer register writes until the end of the context.
+
+        Within the context, writes of IO direction, pullup and output state to the device
+        are deferred, allowing multiple changes to be written in one transaction. On exit,
+        including by an exception, a single changed register is written directly, otherwise
+        the register block is written with commit_state().
+        """
+        self.__deferred += 1
+        try:
+            yield self
+        finally:
+            self.__deferred -= 1
+            if not self.__deferred:
+                if len(self.__dirty) == 1:
+                    self.write8(*self.__dirty.popitem())
+                elif self.__dirty:
+                    self.commit_state()
+
+    def commit_state(self):
+        """Write the buffered register state to the device.
+
+        This method writes the buffered IO direction, pullup and output state to the device
+        in a single transaction, exploiting the register address auto-increment. The
+        read-only INTF and INTCAP registers between GPPU and GPIO are written as zero. If the
+        configuration registers could not be read, or sequential operation is disabled in
+        IOCON, the registers are written individually.
+        """
+        self.__dirty.clear()
+
+        if self.__config is None or self.__config[self.IOCON - self.IPOL] & self.SEQOP:
+            self.write8(self.IODIR, self.__iodir)
+            self.write8(self.GPPU, self.__gppu)
+            self.write8(self.GPIO, self.__gpio)
+            return
+
+        self.writeList(
+            self.IODIR,
+            [self.__iodir] + list(self.__config) + [self.__gppu, 0, 0, self.__gpio]
+        )
 
     def setup(self, pin, direction):
         """Set the IO direction state of a pin.
@@ -56,17 +155,18 @@ class MCP23008(I2CDevice):
         :param direction: direction to set
         """
         # Set direction in register buffer value
+        mask = _pin_mask(pin, 'setup')
         if direction == self.IN:
-            self.__iodir |= 1 << pin
+            self.__iodir |= mask
         elif direction == self.OUT:
-            self.__iodir &= ~(1 << pin)
+            self.__iodir &= ~mask
         else:
             raise ValueError(
                 "MCP23008::setup() expected a direction of MCP23008.IN or MCP23008.OUT"
             )
 
         # Write the state to the IODIR register
-        self.write8(self.IODIR, self.__iodir)
+        self.__write_register(self.IODIR, self.__iodir)
 
     def pullup(self, pin, enabled):
         """Set the pullup state of a pin.
@@ -77,13 +177,14 @@ class MCP23008(I2CDevice):
         :param enabled: pullup state to set (e.g 0, 1, True or False)
         """
         # Set state in register buffer value
+        mask = _pin_mask(pin, 'pullup')
         if enabled:
-            self.__gppu |= 1 << pin
+            self.__gppu |= mask
         else:
-            self.__gppu &= ~(1 << pin)
+            self.__gppu &= ~mask
 
         # Write the GPPU register on the device
-        self.write8(self.GPPU, self.__gppu)
+        self.__write_register(self.GPPU, self.__gppu)
 
     def input(self, pin):
         """Get the input value on a pin.
@@ -103,11 +204,12 @@ class MCP23008(I2CDevice):
         :param pins: list of pins to return input state for
         :return list of bool states of pins requested
         """
-        # Read the GPIO register
+        # Check the requested pins before reading the GPIO register
+        masks = [_pin_mask(pin, 'input_pins') for pin in pins]
         buff = self.readU8(self.GPIO)
 
-        # Buils and return a list of input states for the requested pins
-        return [bool(buff & (1 << pin)) for pin in pins]
+        # Build and return a list of input states for the requested pins
+        return [buff & mask != 0 for mask in masks]
 
     def output(self, pin, value):
         """Set the output state of a pin.
@@ -126,15 +228,18 @@ class MCP23008(I2CDevice):
 
         :param pins: dict of pins and states e.g. {0:MCP23008.OUT, 1:MCP230008.IN}
         """
-        # Iterate over pins and set appropriate bit in GPIO register buffer
+        # Build masks of pins to set and clear, then update the GPIO register buffer
+        set_mask = 0
+        clear_mask = 0
         for pin, val in pins.items():
             if val:
-                self.__gpio |= 1 << pin
+                set_mask |= _pin_mask(pin, 'output_pins')
             else:
-                self.__gpio &= ~(1 << pin)
+                clear_mask |= _pin_mask(pin, 'output_pins')
+        self.__gpio = (self.__gpio & ~clear_mask) | set_mask
 
         # Write the state to the GPIO register
-        self.write8(self.GPIO, self.__gpio)
+        self.__write_register(self.GPIO, self.__gpio)
 
     def disable_outputs(self):
         """Set all outputs of the MCP23008 low.
@@ -142,4 +247,4 @@ class MCP23008(I2CDevice):
         This method sets all output pins of the MCP23008 low.
         """
         self.__gpio = 0
-        self.write8(self.GPIO, self.__gpio)
+        self.__write_register(self.GPIO, self.__gpio)
@@ -7,7 +7,17 @@ James Hogge, STFC Application Engineering Group.
 """
 
 from i2c_device import I2CDevice, I2CException
-import math, sys
+import bisect, math, struct, sys, time
+
+#Fixed point scaling of the 38-bit RFREQ register value
+_RFREQ_SCALE = 1.0 / (1 << 28)
+
+#Legal (HS_DIV * N1, HS_DIV, N1) divider combinations, ordered by composite divider and
+#preferring the largest HS_DIV for a given composite divider
+_DIVIDERS = sorted(
+	[(hs_div * n1, hs_div, n1) for hs_div in [11, 9, 7, 6, 5, 4] for n1 in [1] + list(range(2, 129, 2))],
+	key=lambda divider: (divider[0], -divider[1]))
+_DIVIDER_VALUES = [divider[0] for divider in _DIVIDERS]
 
 class SI570(I2CDevice):
 	"""SI570 class.
@@ -20,6 +30,10 @@ class SI570(I2CDevice):
 	SI570_B = 0
 	SI570_C  = 1
 
+	#Time to wait for a reset to complete and interval between polls (seconds)
+	RESET_TIMEOUT = 0.5
+	RESET_POLL_INTERVAL = 0.002
+
 	def __init__(self, address=0x55, model=SI570_C, **kwargs):
 		"""Initialise the SI570 and determine the crystal frequency.
 		This resets the device to the factory programmed frequency.
@@ -30,13 +44,17 @@ class SI570(I2CDevice):
 		#Registers used are dependant on the device model
 		self.__register = 13 if model == self.SI570_C else 7
 
-		#Reset device to 156.25MHz and calculate fXTAL
+		#Reset device to 156.25MHz and calculate fXTAL, polling until the reset completes
 		self.write8(135, 1 << 7)
+		deadline = time.time() + self.RESET_TIMEOUT
 		while self.readU8(135) & 1:
-			continue;
+			if time.time() > deadline:
+				raise I2CException("Timed out waiting for SI570 reset to complete")
+			time.sleep(self.RESET_POLL_INTERVAL)
 
 		#Device is reset, read initial register configurations
 		data = self.readList(self.__register, 6)
+		self.__reg137 = self.readU8(137)
 		self.__hs_div, self.__n1, self.__rfreq = self.__calculate_params(data)
 		self.__fxtal = (156250000 * self.__hs_div * self.__n1) / self.__rfreq / 1000000
 
@@ -50,13 +68,9 @@ class SI570(I2CDevice):
 	def __calculate_params(self, data):
 		
 		hs_div = ((data[0] >> 5) & 0b111) + 4
-                n1 = ((data[0] << 2) & 0b01111100) + ((data[1] >> 6) & 0b11) + 1
-                rfreq = data[1] & 0b111111
-                for i in range(2, 6):
-                        rfreq <<= 8
-                        rfreq += data[i]
-
-                rfreq /= float(2**28)
+                n1 = (((data[0] << 2) & 0b01111100) | ((data[1] >> 6) & 0b11)) + 1
+                rfreq = struct.unpack(">Q", bytearray(3) + bytearray(data[1:6]))[0] & 0x3FFFFFFFFF
+                rfreq *= _RFREQ_SCALE
 
 		return (hs_div, n1, rfreq)
 
@@ -96,45 +110,37 @@ class SI570(I2CDevice):
 		#Min/max dividers to use based on possible oscillator frequencies		
 		divider_max = int(math.floor(5670.0 / freq))
 		divider_min = int(math.ceil(4850.0 / freq))
-		found = False
-
-
-		for divider in range(divider_min, divider_max + 1):
-			for hs_div in [11, 9, 7, 6, 5, 4]:
-				n1 = int(float(divider) / hs_div)
-				
-				#If desired divider can be produced from HS_DIV and N1
-				if n1 == float(divider) / hs_div and (n1 == 1 or n1 & 1 == 0):
-					found = True
-					self.__n1 = n1
-					self.__hs_div = hs_div
-					break;
-			if found:
-				break;
-		else:
+
+		#Find the smallest legal divider within the range
+		i = bisect.bisect_left(_DIVIDER_VALUES, divider_min)
+		if i == len(_DIVIDER_VALUES) or _DIVIDER_VALUES[i] > divider_max:
 			raise I2CException("There is no possible divider combination for %f MHz" % freq)
 
+		#Re-read register 137 if it could not be read previously, as it is written back
+		if self.__reg137 == I2CDevice.ERROR:
+			self.__reg137 = self.readU8(137)
+			if self.__reg137 == I2CDevice.ERROR:
+				return I2CDevice.ERROR
+
+		self.__hs_div, self.__n1 = _DIVIDERS[i][1:]
+
 		#Calculate RFREQ from divider choice
 		self.__rfreq = freq * self.__hs_div * self.__n1 / self.__fxtal
 
-		#Freeze the oscillator
-		self.write8(137, self.readU8(137) | 0x10)
+		with self.hold():
+			#Freeze the oscillator
+			self.write8(137, self.__reg137 | 0x10)
 		
-		#Update device with new values
-		raw_hs_div = self.__hs_div - 4
-		raw_n1 = self.__n1 - 1
-		raw_rfreq = int(self.__rfreq * 2**28)
-		self.writeList(self.__register,
-			map(int,[(raw_hs_div << 5) + (raw_n1 >> 2),
-			((raw_n1 & 0b11) << 6) + ((raw_rfreq >> 32) & 0b111111),
-			(raw_rfreq >> 24) & 0xff,
-			(raw_rfreq >> 16) & 0xff,
-			(raw_rfreq >> 8) & 0xff,
-			raw_rfreq & 0xff]))
-
-		#Unfreeze the oscillator and set NEWFREQ flag
-		self.write8(137, self.readU8(137) & 0xEF)
-		self.write8(135, 0x40)
+			#Update device with new values
+			raw_hs_div = self.__hs_div - 4
+			raw_n1 = self.__n1 - 1
+			raw_rfreq = int(self.__rfreq * (1 << 28))
+			raw = (raw_hs_div << 45) | (raw_n1 << 38) | (raw_rfreq & 0x3FFFFFFFFF)
+			self.writeList(self.__register, list(bytearray(struct.pack(">Q", raw)[2:])))
+
+			#Unfreeze the oscillator and set NEWFREQ flag
+			self.write8(137, self.__reg137 & 0xEF)
+			self.write8(135, 0x40)
 
 
 #Basic test for the device. Allows controlling of the output frequency
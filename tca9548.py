@@ -11,6 +11,12 @@ James Hogge, STFC Application Engineering Group.
 from lpdpower.i2c_device import I2CDevice, I2CException
 from lpdpower.i2c_container import I2CContainer
 
+# Channel selection masks for each TCA output channel
+_CHANNEL_MASK = tuple(1 << channel for channel in range(8))
+
+# Undecorated TCA register write, used for channel selection within a device access
+_write8 = I2CDevice.write8.undecorated
+
 
 class TCA9548(I2CDevice):
     """TCA9548 class.
@@ -29,38 +35,67 @@ class TCA9548(I2CDevice):
         # Initialise the I2CDevice superclass instance
         I2CDevice.__init__(self, address, **kwargs)
 
-        # Clear attached devices and currently enabled channel
+        # Clear attached devices and the chain of upstream TCA selections for this TCA
         self._attached_devices = {}
-        self._selected_channel = None
+        self._tca_chain = []
 
         # Disable any already enabled devices by clearing output bus selection
         self.write8(0, 0)
+        self._selected_mask = 0
 
     def __device_callback(self, device):
         """Internal device callback method.
 
         This method is called internally to allow attached devices to transparently
-        select the appropriate TCA multiplexer channel. The TCA is accessed only if the
-        device being accessed is not on the currently selected channel.
+        select the appropriate TCA multiplexer channel, along with the channels of any
+        chained TCAs upstream of this one. Each TCA is accessed only if the device being
+        accessed is not on its currently selected channel.
 
         :param device: the device for which the callback is being called.
         """
         # Check the device is attached, otherwise raise an exception
-        if device not in self._attached_devices:
+        if device._tca_owner is not self:
             raise I2CException('Device %s was not properly detached from the TCA' % device)
 
-        # Call own callback (for chained TCAs)
-        if self.pre_access is not None:
-            self.pre_access(self)
+        TCA9548.__select_chain(device._tca_chain)
 
-        # Skip accessing the TCA if the current channel is already selected
-        if self._attached_devices[device] == self._selected_channel:
-            return
+    @staticmethod
+    def __select_chain(chain):
+        """Select a chain of TCA output channels.
 
-        self._selected_channel = self._attached_devices[device]
+        This method is called internally to select the output channels of a chain of TCAs,
+        given as a list of (TCA, mask) pairs ordered from the root TCA downwards. Each TCA
+        is accessed only if the mask differs from its current selection.
 
-        # Write to the TCA to select the correct channel
-        self.write8(0, 1 << self._attached_devices[device])
+        :param chain: list of TCA instances and bit masks of channels to select
+        """
+        # Call the callback of the root TCA (e.g. for a TCA attached to a container)
+        root = chain[0][0]
+        if root.pre_access is not None:
+            root.pre_access(root)
+
+        for tca, mask in chain:
+            # Skip accessing the TCA if the current channel is already selected
+            if tca._selected_mask == mask:
+                continue
+
+            # Write to the TCA to select the correct channel. This must be a separate
+            # transaction from the device access, as the TCA only applies a new selection
+            # on a STOP condition
+            _write8(tca, 0, mask)
+            tca._selected_mask = mask
+
+    def __update_chains(self):
+        """Update the TCA selection chains of attached devices.
+
+        This method is called internally to rebuild the chains of TCA selections needed to
+        access each device attached to this TCA, and to any TCAs chained from it, after the
+        chain for this TCA has changed.
+        """
+        for device in self._attached_devices:
+            device._tca_chain = self._tca_chain + [(self, device._tca_mask)]
+            if isinstance(device, TCA9548):
+                device.__update_chains()
 
     def attach_device(self, channel, device, *args, **kwargs):
         """Attach an I2C device to the TCA multiplexer.
@@ -75,20 +110,31 @@ class TCA9548(I2CDevice):
         :param args: positional arguments to pass to device initialisation
         :param kwargs: keyword arguments to pass to device initialisation
         """
+        # Check a legal channel has been specified and look up its selection mask
+        if not 0 <= channel < len(_CHANNEL_MASK):
+            raise I2CException('Illegal TCA channel {} specified'.format(channel))
+        mask = _CHANNEL_MASK[channel]
+
         # If passed a callable type for a device, initialise it having selected the appropriate
         # TCA channel
         if callable(device):
-            self.write8(0, 1 << channel)
-            self._selected_channel = channel
-            device = device(*args, **kwargs)
+            with self._bus_lock:
+                TCA9548.__select_chain(self._tca_chain + [(self, mask)])
+                device = device(*args, **kwargs)
 
         # Raise an exception if the device is not and I2CDevice or I2CContainer instance
         if not isinstance(device, I2CDevice) and not isinstance(device, I2CContainer):
             raise I2CException(
                 'Device %s must be a type or an instance of I2CDevice or I2CContainer' % device)
 
-        # Add device to attached devices and set its pre-access callback
+        # Add device to attached devices, store its channel mask and chain of TCA selections
+        # and set its pre-access callback
         self._attached_devices[device] = channel
+        device._tca_owner = self
+        device._tca_mask = mask
+        device._tca_chain = self._tca_chain + [(self, mask)]
+        if isinstance(device, TCA9548):
+            device.__update_chains()
         device.pre_access = self.__device_callback
         return device
 
@@ -104,4 +150,8 @@ class TCA9548(I2CDevice):
             raise I2CException('Device %s is not attached to this TCA' % device)
 
         self._attached_devices.pop(device)
+        device._tca_owner = None
+        device._tca_chain = []
+        if isinstance(device, TCA9548):
+            device.__update_chains()
         device.pre_access = None
@@ -0,0 +1,94 @@
+"""Shared fixtures for the I2C device test cases.
+
+The smbus module is only available on the target platform, so a placeholder module is
+provided if it cannot be imported. The fake_smbus fixture then replaces the SMBus class
+for the duration of a test with a fake bus holding device registers and recording all
+accesses made on it.
+"""
+
+import sys
+import types
+
+import pytest
+
+try:
+    import smbus
+except ImportError:
+    smbus = types.ModuleType('smbus')
+    sys.modules['smbus'] = smbus
+
+
+class FakeSMBus(object):
+    """Fake SMBus holding device registers and recording accesses made on the bus.
+
+    Register values are held in the registers dict, keyed by (address, register), and
+    default to zero. Block accesses auto-increment the register. Accesses are recorded in
+    the accesses list as tuples of the access method name and its arguments. Accesses
+    matching an entry of the failures set, either an access method name or a tuple of the
+    name, address and register, raise IOError instead, without being recorded.
+    """
+
+    def __init__(self, busnum):
+        self.busnum = busnum
+        self.registers = {}
+        self.accesses = []
+        self.failures = set()
+
+    def _access(self, name, *args):
+        if name in self.failures or (name,) + args[:2] in self.failures:
+            raise IOError('fake {} failure'.format(name))
+        self.accesses.append((name,) + args)
+
+    def write_byte_data(self, address, reg, value):
+        self._access('write_byte_data', address, reg, value)
+        self.registers[(address, reg)] = value
+
+    def write_word_data(self, address, reg, value):
+        self._access('write_word_data', address, reg, value)
+        self.registers[(address, reg)] = value & 0xFF
+        self.registers[(address, reg + 1)] = value >> 8
+
+    def write_i2c_block_data(self, address, reg, values):
+        self._access('write_i2c_block_data', address, reg, list(values))
+        for offset, value in enumerate(values):
+            self.registers[(address, reg + offset)] = value
+
+    def read_byte_data(self, address, reg):
+        self._access('read_byte_data', address, reg)
+        return self.registers.get((address, reg), 0)
+
+    def read_word_data(self, address, reg):
+        self._access('read_word_data', address, reg)
+        return (self.registers.get((address, reg), 0) |
+                self.registers.get((address, reg + 1), 0) << 8)
+
+    def read_i2c_block_data(self, address, reg, length):
+        self._access('read_i2c_block_data', address, reg, length)
+        return [self.registers.get((address, reg + offset), 0) for offset in range(length)]
+
+
+@pytest.fixture
+def fake_smbus(monkeypatch):
+    """Replace the SMBus class with FakeSMBus for the duration of a test.
+
+    The shared SMBus handles and locks of I2CDevice are cleared, so that devices created
+    in the test use fresh fake buses. Returns a function giving the fake bus for a bus
+    number, which can be used to set up registers before a device is created.
+    """
+    buses = {}
+
+    def get_bus(busnum=2):
+        if busnum not in buses:
+            buses[busnum] = FakeSMBus(busnum)
+        return buses[busnum]
+
+    monkeypatch.setattr(smbus, 'SMBus', get_bus, raising=False)
+
+    # The device modules may be imported both as top-level and lpdpower modules
+    for name in ('i2c_device', 'lpdpower.i2c_device'):
+        module = sys.modules.get(name)
+        if module is not None:
+            monkeypatch.setattr(module.I2CDevice, '_bus_cache', {})
+            monkeypatch.setattr(module.I2CDevice, '_bus_locks', {})
+
+    return get_bus
@@ -0,0 +1,61 @@
+"""Test cases for the AD7998 12-bit I2C ADC class.
+
+Devices are created on a fake bus holding conversion results, tagged with their channel
+identifiers, so that the values read back for all channels can be checked.
+"""
+
+import pytest
+
+from i2c_device import I2CDevice
+from ad7998 import AD7998
+
+ADDRESS = 0x20
+
+# Raw conversion results for each channel, with the channel identifier in the upper 4 bits
+RAW_RESULTS = tuple((channel << 12) | (channel * 0x1FF) for channel in range(8))
+
+
+@pytest.fixture
+def bus(fake_smbus):
+    """Provide the fake bus, with conversion results for all channels read from 0x70."""
+    bus = fake_smbus()
+    for channel, value in enumerate(RAW_RESULTS):
+        bus.registers[(ADDRESS, 0x70 + 2 * channel)] = value >> 8
+        bus.registers[(ADDRESS, 0x71 + 2 * channel)] = value & 0xFF
+    return bus
+
+
+def test_read_all_scaled(bus):
+    """All channels are converted and read in a single transaction and scaled."""
+    ad7998 = AD7998(ADDRESS)
+    bus.accesses[:] = []
+
+    values = ad7998.read_all_scaled()
+
+    assert bus.accesses == [('read_i2c_block_data', ADDRESS, 0x70, 16)]
+    assert values == pytest.approx([channel * 0x1FF / 4095.0 for channel in range(8)])
+
+
+def test_read_all_scaled_error(bus):
+    """A failed read of all channels returns the error value."""
+    ad7998 = AD7998(ADDRESS)
+    bus.failures.add('read_i2c_block_data')
+
+    assert ad7998.read_all_scaled() == I2CDevice.ERROR
+
+
+def test_read_all_raw(bus):
+    """Raw results for all channels are returned with their channel identifiers."""
+    ad7998 = AD7998(ADDRESS)
+    bus.accesses[:] = []
+
+    assert ad7998.read_all_raw() == RAW_RESULTS
+    assert bus.accesses == [('read_i2c_block_data', ADDRESS, 0x70, 16)]
+
+
+def test_read_all_raw_error(bus):
+    """A failed read of all channels returns the error value."""
+    ad7998 = AD7998(ADDRESS)
+    bus.failures.add('read_i2c_block_data')
+
+    assert ad7998.read_all_raw() == I2CDevice.ERROR
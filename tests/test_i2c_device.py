@@ -0,0 +1,39 @@
+"""Test cases for the I2CDevice access class.
+
+Devices are created on a fake bus, so that the pre-access callbacks called for accesses
+can be checked as the callback of a device is set and cleared.
+"""
+
+from lpdpower.i2c_device import I2CDevice
+
+
+def test_accessors_bypass_wrapper_without_callback(fake_smbus):
+    """Without a callback, accessors are bound to their undecorated implementations."""
+    device = I2CDevice(0x20)
+
+    for name in I2CDevice._accessors:
+        assert getattr(device, name).__func__ is getattr(I2CDevice, name).undecorated
+
+    device.write8(0, 0x12)
+    assert device.readU8(0) == 0x12
+
+
+def test_callback_rebinding(fake_smbus):
+    """Setting and clearing the callback rebinds the accessors of the instance."""
+    calls = []
+    device = I2CDevice(0x20)
+    other = I2CDevice(0x21)
+
+    device.pre_access = calls.append
+    device.readU8(0)
+    device.write8(0, 1)
+    other.readU8(0)
+    assert calls == [device, device]
+
+    device.pre_access = None
+    device.readU8(0)
+    assert calls == [device, device]
+
+    device.pre_access = calls.append
+    device.readList(0, 2)
+    assert calls == [device, device, device]
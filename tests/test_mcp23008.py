@@ -0,0 +1,148 @@
+"""Test cases for the MCP23008 I2C GPIO extender class.
+
+Devices are created on a fake bus, so that the register accesses issued for the buffered
+IO direction, pullup and output state can be checked.
+"""
+
+import pytest
+
+from lpdpower.mcp23008 import MCP23008
+
+ADDRESS = 0x20
+
+
+@pytest.fixture
+def bus(fake_smbus):
+    """Provide the fake bus, with the MCP23008 registers set to initial values."""
+    bus = fake_smbus()
+    bus.registers.update({
+        (ADDRESS, MCP23008.IODIR): 0xFF,
+        (ADDRESS, MCP23008.GPPU): 0x00,
+        (ADDRESS, MCP23008.GPIO): 0x81,
+    })
+    return bus
+
+
+def test_input_pins(bus):
+    """Input states of the requested pins are read from the GPIO register."""
+    mcp = MCP23008(ADDRESS)
+
+    assert mcp.input_pins([7, 0, 1]) == [True, True, False]
+    assert mcp.input(1) is False
+
+
+@pytest.mark.parametrize('pin', [-1, 8])
+def test_invalid_pin_rejected(bus, pin):
+    """Pins outside the range 0-7 are rejected before accessing the device."""
+    mcp = MCP23008(ADDRESS)
+    bus.accesses[:] = []
+
+    with pytest.raises(ValueError):
+        mcp.input_pins([0, pin])
+    with pytest.raises(ValueError):
+        mcp.setup(pin, MCP23008.OUT)
+    with pytest.raises(ValueError):
+        mcp.pullup(pin, True)
+    with pytest.raises(ValueError):
+        mcp.output_pins({0: MCP23008.HIGH, pin: MCP23008.LOW})
+
+    assert bus.accesses == []
+
+
+def test_output_pins(bus):
+    """Output states of several pins are set in a single GPIO register write."""
+    mcp = MCP23008(ADDRESS)
+    bus.accesses[:] = []
+
+    mcp.output_pins({0: MCP23008.LOW, 1: MCP23008.HIGH, 6: MCP23008.HIGH})
+    mcp.output(7, MCP23008.LOW)
+
+    assert bus.accesses == [
+        ('write_byte_data', ADDRESS, MCP23008.GPIO, 0xC2),
+        ('write_byte_data', ADDRESS, MCP23008.GPIO, 0x42),
+    ]
+
+
+def test_deferred_writes_committed_as_register_block(bus):
+    """Several deferred register changes are written as one block from IODIR to GPIO."""
+    bus.registers.update({
+        (ADDRESS, MCP23008.IPOL): 0x01, (ADDRESS, 0x02): 0x02, (ADDRESS, 0x03): 0x03,
+        (ADDRESS, 0x04): 0x04, (ADDRESS, MCP23008.IOCON): 0x08,
+        (ADDRESS, 0x07): 0x55, (ADDRESS, 0x08): 0xAA,
+    })
+    mcp = MCP23008(ADDRESS)
+    assert bus.accesses == [
+        ('read_byte_data', ADDRESS, MCP23008.IOCON),
+        ('read_i2c_block_data', ADDRESS, MCP23008.IODIR, 10),
+    ]
+    bus.accesses[:] = []
+
+    with mcp.defer_writes():
+        mcp.setup(0, MCP23008.OUT)
+        with mcp.defer_writes():
+            mcp.pullup(1, True)
+        mcp.output(0, MCP23008.HIGH)
+        assert bus.accesses == []
+
+    assert bus.accesses == [(
+        'write_i2c_block_data', ADDRESS, MCP23008.IODIR,
+        [0xFE, 0x01, 0x02, 0x03, 0x04, 0x08, 0x02, 0x00, 0x00, 0x81]
+    )]
+
+
+def test_single_deferred_register_written_directly(bus):
+    """A single changed register is written on its own rather than as a block."""
+    mcp = MCP23008(ADDRESS)
+    bus.accesses[:] = []
+
+    with mcp.defer_writes():
+        mcp.setup(0, MCP23008.OUT)
+        mcp.setup(1, MCP23008.OUT)
+
+    assert bus.accesses == [('write_byte_data', ADDRESS, MCP23008.IODIR, 0xFC)]
+
+
+@pytest.mark.parametrize('iocon, failures', [
+    (MCP23008.SEQOP, set()),
+    (0x00, {'read_i2c_block_data'}),
+])
+def test_registers_written_individually_without_block_access(bus, iocon, failures):
+    """Registers are accessed individually if SEQOP is set or the block read fails."""
+    bus.registers[(ADDRESS, MCP23008.IOCON)] = iocon
+    bus.failures.update(failures)
+    mcp = MCP23008(ADDRESS)
+    bus.failures.clear()
+    assert bus.accesses[-3:] == [
+        ('read_byte_data', ADDRESS, MCP23008.IODIR),
+        ('read_byte_data', ADDRESS, MCP23008.GPPU),
+        ('read_byte_data', ADDRESS, MCP23008.GPIO),
+    ]
+    bus.accesses[:] = []
+
+    with mcp.defer_writes():
+        mcp.setup(0, MCP23008.OUT)
+        mcp.output(1, MCP23008.HIGH)
+
+    assert bus.accesses == [
+        ('write_byte_data', ADDRESS, MCP23008.IODIR, 0xFE),
+        ('write_byte_data', ADDRESS, MCP23008.GPPU, 0x00),
+        ('write_byte_data', ADDRESS, MCP23008.GPIO, 0x83),
+    ]
+
+
+def test_deferred_writes_flushed_on_exception(bus):
+    """Deferred register changes are written if the context exits with an exception."""
+    mcp = MCP23008(ADDRESS)
+    bus.accesses[:] = []
+
+    with pytest.raises(RuntimeError):
+        with mcp.defer_writes():
+            mcp.output(1, MCP23008.HIGH)
+            raise RuntimeError()
+
+    mcp.output(2, MCP23008.HIGH)
+
+    assert bus.accesses == [
+        ('write_byte_data', ADDRESS, MCP23008.GPIO, 0x83),
+        ('write_byte_data', ADDRESS, MCP23008.GPIO, 0x87),
+    ]
@@ -0,0 +1,86 @@
+"""Test cases for the SI570 I2C clock class.
+
+Devices are created on a fake bus holding the factory configuration of an SI570 at
+156.25MHz, so that the register writes issued to set the frequency can be checked.
+"""
+
+import math
+import sys
+
+import pytest
+
+if sys.version_info[0] > 2:
+    pytest.skip('si570 module requires Python 2', allow_module_level=True)
+
+from i2c_device import I2CDevice
+from si570 import SI570
+
+ADDRESS = 0x55
+
+
+@pytest.fixture
+def bus(fake_smbus):
+    """Provide the fake bus, with the SI570 registers set to the factory configuration."""
+    bus = fake_smbus(1)
+    # HS_DIV=4, N1=8 and RFREQ=43.75, for an fXTAL of 114.285MHz
+    for offset, value in enumerate([0x01, 0xC2, 0xBC, 0x00, 0x00, 0x00]):
+        bus.registers[(ADDRESS, 13 + offset)] = value
+    bus.registers[(ADDRESS, 137)] = 0x08
+    return bus
+
+
+def test_register_137_reread_after_init_error(bus):
+    """Register 137 is re-read to set the frequency if the read failed at init."""
+    bus.failures.add(('read_byte_data', ADDRESS, 137))
+    si570 = SI570(ADDRESS)
+    bus.failures.clear()
+    bus.accesses[:] = []
+
+    si570.set_frequency(100.0)
+    si570.set_frequency(200.0)
+
+    accesses_137 = [access for access in bus.accesses if access[2] == 137]
+    assert accesses_137 == [
+        ('read_byte_data', ADDRESS, 137),
+        ('write_byte_data', ADDRESS, 137, 0x18),
+        ('write_byte_data', ADDRESS, 137, 0x08),
+        ('write_byte_data', ADDRESS, 137, 0x18),
+        ('write_byte_data', ADDRESS, 137, 0x08),
+    ]
+
+
+def test_frequency_not_set_without_register_137(bus):
+    """The frequency is not set if register 137 cannot be read."""
+    bus.failures.add(('read_byte_data', ADDRESS, 137))
+    si570 = SI570(ADDRESS)
+    bus.accesses[:] = []
+
+    assert si570.set_frequency(100.0) == I2CDevice.ERROR
+    assert bus.accesses == []
+
+
+def _search_dividers(freq):
+    """Find the (HS_DIV, N1) dividers for a frequency with a search over all dividers."""
+    divider_max = int(math.floor(5670.0 / freq))
+    divider_min = int(math.ceil(4850.0 / freq))
+    for divider in range(divider_min, divider_max + 1):
+        for hs_div in [11, 9, 7, 6, 5, 4]:
+            n1 = int(float(divider) / hs_div)
+            if n1 == float(divider) / hs_div and (n1 == 1 or n1 & 1 == 0):
+                return (hs_div, n1)
+    return None
+
+
+def test_divider_table_matches_search(bus):
+    """Dividers looked up from the table match a search over all dividers."""
+    si570 = SI570(ADDRESS)
+
+    for step in range(1000, 94501):
+        freq = step / 100.0
+        bus.accesses[:] = []
+        si570.set_frequency(freq)
+
+        data = [access[3] for access in bus.accesses if access[0] == 'write_i2c_block_data']
+        hs_div = (data[0][0] >> 5) + 4
+        n1 = (((data[0][0] & 0x1F) << 2) | (data[0][1] >> 6)) + 1
+        assert (hs_div, n1) == _search_dividers(freq), freq
@@ -0,0 +1,85 @@
+"""Test cases for the TCA9548 I2C bus multiplexer class.
+
+Devices are created on a fake bus recording all accesses, so that the channel selection
+writes issued for devices behind chained multiplexers can be checked.
+"""
+
+import pytest
+
+from lpdpower.i2c_device import I2CDevice
+from lpdpower.tca9548 import TCA9548
+
+
+@pytest.fixture
+def root_tca(fake_smbus):
+    """Provide a multiplexer at the root of the fake bus, with its accesses cleared."""
+    root = TCA9548(0x71)
+    root.bus.accesses[:] = []
+    return root
+
+
+def test_device_access_selects_channel(root_tca):
+    """Accessing a device selects its channel only when not already selected."""
+    dev_a = root_tca.attach_device(1, I2CDevice(0x20))
+    dev_b = root_tca.attach_device(2, I2CDevice(0x21))
+
+    dev_a.readU8(0)
+    dev_a.readU8(1)
+    dev_b.readU8(0)
+
+    assert root_tca.bus.accesses == [
+        ('write_byte_data', 0x71, 0, 1 << 1),
+        ('read_byte_data', 0x20, 0),
+        ('read_byte_data', 0x20, 1),
+        ('write_byte_data', 0x71, 0, 1 << 2),
+        ('read_byte_data', 0x21, 0),
+    ]
+
+
+def test_sibling_muxes_at_same_address(root_tca):
+    """Chained multiplexers sharing an address on different channels are each selected."""
+    mux_b = root_tca.attach_device(1, TCA9548, 0x70)
+    mux_a = root_tca.attach_device(0, TCA9548, 0x70)
+    root_tca.bus.accesses[:] = []
+
+    dev_b = mux_b.attach_device(3, I2CDevice, 0x20)
+    assert root_tca.bus.accesses == [
+        ('write_byte_data', 0x71, 0, 1 << 1),
+        ('write_byte_data', 0x70, 0, 1 << 3),
+    ]
+
+    dev_a = mux_a.attach_device(3, I2CDevice(0x21))
+    root_tca.bus.accesses[:] = []
+
+    dev_a.readU8(0)
+    dev_b.readU8(0)
+
+    assert root_tca.bus.accesses == [
+        ('write_byte_data', 0x71, 0, 1 << 0),
+        ('write_byte_data', 0x70, 0, 1 << 3),
+        ('read_byte_data', 0x21, 0),
+        ('write_byte_data', 0x71, 0, 1 << 1),
+        ('read_byte_data', 0x20, 0),
+    ]
+
+
+def test_device_hold_reselects_channel_after_switch(root_tca):
+    """A held device reselects its channel if another device switched it within the hold."""
+    dev_a = root_tca.attach_device(1, I2CDevice(0x20))
+    dev_b = root_tca.attach_device(2, I2CDevice(0x21))
+
+    with dev_a.hold():
+        dev_a.readU8(0)
+        dev_b.readU8(0)
+        dev_a.readU8(1)
+        dev_a.readU8(2)
+
+    assert root_tca.bus.accesses == [
+        ('write_byte_data', 0x71, 0, 1 << 1),
+        ('read_byte_data', 0x20, 0),
+        ('write_byte_data', 0x71, 0, 1 << 2),
+        ('read_byte_data', 0x21, 0),
+        ('write_byte_data', 0x71, 0, 1 << 1),
+        ('read_byte_data', 0x20, 1),
+        ('read_byte_data', 0x20, 2),
+    ]
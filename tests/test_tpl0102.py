@@ -0,0 +1,117 @@
+"""Test cases for the TPL0102 dual channel I2C potentiometer class.
+
+Devices are created on a fake bus, so that the register writes issued from the shadowed
+wiper and control register values can be checked, including after access errors.
+"""
+
+import pytest
+
+from tpl0102 import TPL0102
+
+ADDRESS = 0x50
+
+
+@pytest.fixture
+def bus(fake_smbus):
+    """Provide the fake bus, with the TPL0102 registers set to initial values."""
+    bus = fake_smbus()
+    bus.registers.update({(ADDRESS, 0): 0x10, (ADDRESS, 1): 0x20, (ADDRESS, 16): 0x01})
+    return bus
+
+
+def test_control_register_written_from_shadow(bus):
+    """Control register setters write the shadowed value without reading it back."""
+    tpl = TPL0102(ADDRESS)
+    bus.accesses[:] = []
+
+    tpl.set_non_volatile(True)
+    tpl.set_shutdown(True)
+    tpl.set_non_volatile(False)
+
+    assert bus.accesses == [
+        ('write_byte_data', ADDRESS, 16, 0x81),
+        ('write_byte_data', ADDRESS, 16, 0xC1),
+        ('write_byte_data', ADDRESS, 16, 0x41),
+    ]
+
+
+def test_control_register_reread_after_init_error(bus):
+    """A control register read failing at init is re-read before the first write."""
+    bus.failures.add('read_byte_data')
+    tpl = TPL0102(ADDRESS)
+    bus.failures.clear()
+    bus.accesses[:] = []
+
+    tpl.set_shutdown(True)
+
+    assert bus.accesses == [
+        ('read_byte_data', ADDRESS, 16),
+        ('write_byte_data', ADDRESS, 16, 0x41),
+    ]
+
+
+def test_control_register_reread_after_write_error(bus):
+    """A failed control register write invalidates the shadowed value."""
+    tpl = TPL0102(ADDRESS)
+    bus.failures.add('write_byte_data')
+    tpl.set_shutdown(True)
+    bus.failures.clear()
+    bus.accesses[:] = []
+
+    tpl.set_non_volatile(True)
+
+    assert bus.accesses == [
+        ('read_byte_data', ADDRESS, 16),
+        ('write_byte_data', ADDRESS, 16, 0x81),
+    ]
+
+
+def test_wiper_write_skipped_when_in_position(bus):
+    """Writing a wiper is skipped if the shadowed position is unchanged."""
+    tpl = TPL0102(ADDRESS)
+    bus.accesses[:] = []
+
+    tpl.set_wiper(0, 0x10)
+    tpl.set_wiper(1, 0x30)
+    tpl.set_wiper(1, 0x30)
+
+    assert bus.accesses == [('write_byte_data', ADDRESS, 1, 0x30)]
+
+
+def test_wiper_rewritten_after_write_error(bus):
+    """A failed wiper write invalidates the shadowed position, so it is retried."""
+    tpl = TPL0102(ADDRESS)
+    bus.failures.add('write_byte_data')
+    tpl.set_wiper(0, 0x40)
+    bus.failures.clear()
+    bus.accesses[:] = []
+
+    tpl.set_wiper(0, 0x40)
+
+    assert bus.accesses == [('write_byte_data', ADDRESS, 0, 0x40)]
+
+
+def test_wipers_written_in_single_block(bus):
+    """Both wipers are written in one block write, skipped if both are in position."""
+    tpl = TPL0102(ADDRESS)
+    bus.accesses[:] = []
+
+    tpl.set_wipers(0x10, 0x20)
+    tpl.set_wipers(0x30, 300)
+    tpl.set_wiper(1, 0xFF)
+
+    assert bus.accesses == [('write_i2c_block_data', ADDRESS, 0, [0x30, 0xFF])]
+
+
+def test_wipers_rewritten_after_write_error(bus):
+    """A failed block write invalidates both shadowed positions, so they are retried."""
+    tpl = TPL0102(ADDRESS)
+    bus.failures.add('write_i2c_block_data')
+    tpl.set_wipers(0x30, 0x40)
+    bus.failures.clear()
+    bus.accesses[:] = []
+
+    tpl.set_wipers(0x30, 0x40)
+    tpl.set_wiper(0, 0x30)
+
+    assert bus.accesses == [('write_i2c_block_data', ADDRESS, 0, [0x30, 0x40])]
@@ -9,6 +9,12 @@ James Hogge, STFC Application Engineering Group.
 
 from i2c_device import I2CDevice, I2CException
 
+def _clamp_position(position):
+	"""Clamps a wiper position to the range of the device [0-255]
+	"""
+
+	return 0 if position < 0 else 255 if position > 255 else position
+
 class TPL0102(I2CDevice):
 	"""TPL0102 class.
 
@@ -25,16 +31,71 @@ class TPL0102(I2CDevice):
 
 		#Read back current wiper settings
 		self.__wiper_pos = [self.readU8(0), self.readU8(1)]
-		self.__tot_resistance = 100.0
-		self.__low_pd = [0.0,0.0]
-		self.__high_pd = [3.3, 3.3]
+		self.__res_scale = 256.0 / 100.0
+		self.__pd_scale = [256.0 / 3.3, 256.0 / 3.3]
+		self.__pd_offset = [0.0, 0.0]
+
+		#Read back current control register setting
+		self.__reg16 = self.readU8(16)
+
+	def __write_wiper(self, wiper, position):
+		"""Writes a wiper position, skipping the write if the wiper is already in position
+		:param wiper: Wiper to set 0=A, 1=B
+		:param position: Target position, clamped to [0-255]
+		"""
+
+		position = _clamp_position(position)
+		if position == self.__wiper_pos[wiper]:
+			return
+
+		#Only shadow the position once written, as the wiper is otherwise unknown
+		self.__wiper_pos[wiper] = I2CDevice.ERROR
+		if self.write8(wiper, position) != I2CDevice.ERROR:
+			self.__wiper_pos[wiper] = position
+
+	def __write_wipers(self, position_a, position_b):
+		"""Writes both wiper positions in a single transaction, skipping the write if both
+		wipers are already in position
+		:param position_a: Target position for wiper A, clamped to [0-255]
+		:param position_b: Target position for wiper B, clamped to [0-255]
+		"""
+
+		positions = [_clamp_position(position_a), _clamp_position(position_b)]
+		if positions == self.__wiper_pos:
+			return
+
+		#Only shadow the positions once written, as the wipers are otherwise unknown
+		self.__wiper_pos = [I2CDevice.ERROR, I2CDevice.ERROR]
+		if self.writeList(0, positions) != I2CDevice.ERROR:
+			self.__wiper_pos = positions
+
+	def __write_control(self, bit, enable):
+		"""Sets or clears a bit of the control register from the shadowed value, re-reading
+		the register if the shadowed value is invalid after an access error
+		:param bit: Bit mask within the control register
+		:param enable: true - set bit, false - clear bit
+		"""
+
+		reg16 = self.__reg16
+		if reg16 == I2CDevice.ERROR:
+			reg16 = self.readU8(16)
+			if reg16 == I2CDevice.ERROR:
+				return
+
+		if enable: reg16 |= bit
+		else: reg16 &= ~bit
+
+		#Only shadow the value once written, as the register is otherwise unknown
+		self.__reg16 = I2CDevice.ERROR
+		if self.write8(16, reg16) != I2CDevice.ERROR:
+			self.__reg16 = reg16
 
 	def set_total_resistance(self, resistance):
 		"""Sets the total resistance across the potentiometer for set_resistance()
 		:param resistance: Total resistance between H- and L- (Kiloohms)
 		"""
 
-		self.__tot_resistance = float(resistance)
+		self.__res_scale = 256.0 / float(resistance)
 
 	def set_resistance(self, wiper, resistance):
 		"""Sets the resistance of a given wiper in rheostat mode (see datasheet)
@@ -42,11 +103,10 @@ class TPL0102(I2CDevice):
 		:param resistance: Desired resistance between H- and W- (Kiloohms)
 		"""
 
-		if not wiper in [0,1]:
+		if wiper not in (0, 1):
 			raise I2CException("Select either wiper 0 or wiper 1")
 
-		self.__wiper_pos[wiper] = int(resistance / self.__tot_resistance * 256.0)
-		self.write8(wiper, self.__wiper_pos[wiper])
+		self.__write_wiper(wiper, int(resistance * self.__res_scale))
 
 	def set_terminal_PDs(self, wiper, low, high):
 		"""Sets the potential difference for H- and L- on a given wiper for set_PD()
@@ -55,11 +115,11 @@ class TPL0102(I2CDevice):
 		:param high: High PD (Volts)
 		"""
 
-		if not wiper in [0,1]:
+		if wiper not in (0, 1):
                         raise I2CException("Select either wiper 0 or wiper 1")
 
-		self.__low_pd[wiper] = float(low)
-		self.__high_pd[wiper] = float(high)
+		self.__pd_scale[wiper] = 256.0 / (float(high) - float(low))
+		self.__pd_offset[wiper] = -float(low) * self.__pd_scale[wiper]
 
 	def set_PD(self, wiper, pd):
 		"""Sets the potential difference of a given wiper in potential divider mode (see datasheet)
@@ -67,11 +127,10 @@ class TPL0102(I2CDevice):
 		:param pd: Target potential difference (Volts)
 		"""
 
-		if not wiper in [0,1]:
+		if wiper not in (0, 1):
 			raise I2CException("Select either wiper 0 or wiper 1")
 
-		self.__wiper_pos[wiper] = int((pd - self.__low_pd[wiper]) / (self.__high_pd[wiper] - self.__low_pd[wiper]) * 256.0)
-		self.write8(wiper, self.__wiper_pos[wiper])
+		self.__write_wiper(wiper, int(pd * self.__pd_scale[wiper] + self.__pd_offset[wiper]))
 
 	def set_wiper(self, wiper, position):
 		"""Manually sets a wiper position
@@ -79,30 +138,46 @@ class TPL0102(I2CDevice):
 		:param position: Target position [0-255]
 		"""
 
-		if not wiper in [0,1]:
+		if wiper not in (0, 1):
                         raise I2CException("Select either wiper 0 or wiper 1")
 
-		self.__wiper_pos[wiper] = int(position)
-		self.write8(wiper, self.__wiper_pos[wiper])
+		self.__write_wiper(wiper, int(position))
+
+	def set_resistances(self, resistance_a, resistance_b):
+		"""Sets the resistance of both wipers in rheostat mode in a single transaction
+		:param resistance_a: Desired resistance between H- and W- for wiper A (Kiloohms)
+		:param resistance_b: Desired resistance between H- and W- for wiper B (Kiloohms)
+		"""
+
+		self.__write_wipers(int(resistance_a * self.__res_scale), int(resistance_b * self.__res_scale))
+
+	def set_PDs(self, pd_a, pd_b):
+		"""Sets the potential difference of both wipers in potential divider mode in a single transaction
+		:param pd_a: Target potential difference for wiper A (Volts)
+		:param pd_b: Target potential difference for wiper B (Volts)
+		"""
+
+		self.__write_wipers(int(pd_a * self.__pd_scale[0] + self.__pd_offset[0]),
+			int(pd_b * self.__pd_scale[1] + self.__pd_offset[1]))
+
+	def set_wipers(self, position_a, position_b):
+		"""Manually sets both wiper positions in a single transaction
+		:param position_a: Target position for wiper A [0-255]
+		:param position_b: Target position for wiper B [0-255]
+		"""
+
+		self.__write_wipers(int(position_a), int(position_b))
 
 	def set_non_volatile(self, enable):
 		"""Sets whether to use non volatile registers on the I2C device
 		:param enable: true - non volatile, false - volatile
 		"""
 
-		dat = self.readU8(16)
-		if enable: dat |= 0x80
-		else: dat &= ~0x80
-
-		self.write8(16, dat)
+		self.__write_control(0x80, enable)
 
 	def set_shutdown(self, enable):
 		"""Sets whether to use shutdown mode
 		:param enable: true - device enters shutdown mode, false - normal operation
 		"""
 
-		dat = self.readU8(16)
-		if enable: dat |= 0x40
-		else: dat &= ~0x40
-
-		self.write8(16, dat)
+		self.__write_control(0x40, enable)